@@ -1,12 +1,15 @@
 import ast
+import math
 import re
 import string
 import uuid
 import warnings
 from abc import ABC, abstractmethod
-from collections import Counter, defaultdict
+from bisect import bisect_right
+from collections import Counter
 from copy import deepcopy
 from dataclasses import field
+from functools import lru_cache
 from operator import itemgetter
 from statistics import mean
 from typing import Any, Dict, Generator, List, Optional, Tuple
@@ -2344,18 +2347,29 @@ class Perplexity(BulkInstanceMetric):
     class Template:
         regex = re.compile(r"\{(\w+)}")
 
-        @classmethod
-        def apply(cls, template, **kwargs):
-            matches = Perplexity.Template.regex.finditer(template)
-            output = []
+        @staticmethod
+        @lru_cache(maxsize=32)
+        def _compile(template):
+            """Parse a template string once into (literal, field name) parts."""
+            parts = []
             cursor = 0
-            for match in matches:
-                start = match.start()
-                end = match.end()
-                output.append(template[cursor:start])
-                output.append(kwargs[match.group(1)])
-                cursor = end
-            output.append(template[cursor:])
+            for match in Perplexity.Template.regex.finditer(template):
+                parts.append((template[cursor : match.start()], match.group(1)))
+                cursor = match.end()
+            parts.append((template[cursor:], None))
+            return parts
+
+        # the same (prediction, reference) pair is often rendered repeatedly
+        # (e.g. one reference against many predictions), so memoize the
+        # rendered strings instead of re-interpolating the template each time
+        @staticmethod
+        @lru_cache(maxsize=4096)
+        def apply(template, **kwargs):
+            output = []
+            for literal, field_name in Perplexity.Template._compile(template):
+                output.append(literal)
+                if field_name is not None:
+                    output.append(kwargs[field_name])
             return "".join(output)
 
     class AbstractLM(ABC):
@@ -2368,7 +2382,20 @@ class Perplexity(BulkInstanceMetric):
             self.model = (
                 self.model_class().from_pretrained(self.model_name).to(self.device)
             )
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            # pad decoder-only inputs on the left so the target tokens stay
+            # adjacent to the source, and prefer the fast (Rust) tokenizer
+            padding_side = (
+                "left" if isinstance(self, Perplexity.DecoderOnlyLM) else "right"
+            )
+            try:
+                self.tokenizer = AutoTokenizer.from_pretrained(
+                    self.model_name, use_fast=True, padding_side=padding_side
+                )
+            except (ValueError, OSError):
+                # not every model ships a fast tokenizer implementation
+                self.tokenizer = AutoTokenizer.from_pretrained(
+                    self.model_name, use_fast=False, padding_side=padding_side
+                )
             if self.tokenizer.pad_token_id is None:
                 self.tokenizer.pad_token_id = self.tokenizer.eos_token_id
             self.single_token_mode = single_token_mode
@@ -2377,10 +2404,13 @@ class Perplexity(BulkInstanceMetric):
             self, source: List[str], target: List[str], batch_size: int
         ) -> List[float]:
             import torch
+            from torch.nn import functional
 
             scores = []
 
-            with torch.no_grad():
+            # inference_mode disables autograd bookkeeping entirely; we never
+            # backpropagate through the loss here
+            with torch.inference_mode():
                 # break the documents to batches
                 n_batches = int(len(source) / batch_size)
                 batch_range = range(n_batches + 1)
@@ -2410,21 +2440,23 @@ class Perplexity(BulkInstanceMetric):
 
                         # the model returns mean over all batch. We run the CE again without reduction
                         # and extract the mean for each document
-                        loss_fct = torch.nn.CrossEntropyLoss(
-                            ignore_index=-100, reduction="none"
-                        )
 
                         # logits.size(-1) = the dimension of the vocabulary
                         # labels.view(-1) = flattens the labels tensor to 1d
-                        loss = loss_fct(
-                            logits.view(-1, logits.size(-1)), labels.view(-1)
+                        loss = functional.cross_entropy(
+                            logits.view(-1, logits.size(-1)),
+                            labels.view(-1),
+                            ignore_index=-100,
+                            reduction="none",
                         )
                         loss = loss.view(len(batch_source), -1)
 
-                        # for each document, do mean only over the non zero values (sum(labels>0))
-                        batch_loss = torch.sum(loss, dim=1) / torch.sum(
-                            labels > 0, dim=1
-                        )
+                        # for each document, do mean only over the real target
+                        # positions, i.e. those not masked out with -100 by
+                        # compute_batch (unlike labels > 0, this does not drop
+                        # a legitimate token id 0)
+                        lengths = (labels != -100).sum(dim=1)
+                        batch_loss = torch.sum(loss, dim=1) / lengths.clamp(min=1)
 
                         # e^-average(cross-entropy-loss(logits) == geometric mean of the probabilities
                         # proof:
@@ -2447,8 +2479,11 @@ class Perplexity(BulkInstanceMetric):
                         # https://stackoverflow.com/questions/59722983/how-to-calculate-geometric-mean-in-a-differentiable-way
                         geometric_mean = (-batch_loss).exp()
 
-                        # append the batch scores to the list of all scores
-                        scores.append(geometric_mean)
+                        # append the batch scores to the list of all scores,
+                        # moving them to the CPU right away so device memory
+                        # does not accumulate over the whole run
+                        scores.append(geometric_mean.detach().cpu())
+                        del logits, labels, loss, batch_loss, geometric_mean
 
             return torch.cat(scores, dim=0).tolist()
 
@@ -2471,10 +2506,11 @@ class Perplexity(BulkInstanceMetric):
             attention = tokens_source["attention_mask"].to(self.device)
             labels = tokens_target["input_ids"].to(self.device)
 
+            # the tokenizer already emits int64 tensors, no need to cast
             logits = self.model(
-                input_ids=tokens_docs_ids.long(),
-                attention_mask=attention.long(),
-                labels=labels.long(),
+                input_ids=tokens_docs_ids,
+                attention_mask=attention,
+                labels=labels,
             ).logits
 
             # replace the padding token in the labels by -100
@@ -2513,10 +2549,9 @@ class Perplexity(BulkInstanceMetric):
             attention = attention.to(self.device)
             labels = labels.to(self.device)
 
-            # no need to pass labels as we calculate the loss below per document
-            model_output = self.model(
-                input_ids=tokens.long(), attention_mask=attention.long()
-            )
+            # no need to pass labels as we calculate the loss below per document;
+            # the tokenizer already emits int64 tensors, no need to cast
+            model_output = self.model(input_ids=tokens, attention_mask=attention)
             logits = model_output.logits
 
             # in decoder only, the first token is not being generated, it is taken from the input,
@@ -2561,7 +2596,7 @@ class NDCG(GlobalMetric):
 
     main_score = "nDCG"
 
-    _requirements_list: List[str] = ["sklearn"]
+    _requirements_list: List[str] = ["sklearn", "pandas"]
     single_reference_per_prediction = True
     prediction_type = "Optional[float]"
 
@@ -2577,35 +2612,37 @@ class NDCG(GlobalMetric):
         predictions: List[Any],
         task_data: List[Any],
     ) -> dict:
-        from collections import defaultdict
+        import pandas as pd
 
-        query_to_predictions_and_references = defaultdict(lambda: [[], []])
-        references = [reference[0] for reference in references]
-        for reference, pred, inputs_dict in zip(references, predictions, task_data):
-            query = inputs_dict.get("query")
-            query_to_predictions_and_references[query][0].append(pred)
-            query_to_predictions_and_references[query][1].append(reference)
+        # group the instances by query in a single vectorized pass, instead of
+        # growing per-query python lists one append at a time
+        df = pd.DataFrame(
+            {
+                "query": [inputs_dict.get("query") for inputs_dict in task_data],
+                "prediction": predictions,
+                "reference": [reference[0] for reference in references],
+            }
+        )
 
         scores = []
-        for q_predictions, q_references in query_to_predictions_and_references.values():
-            if len(q_references) == 1:
+        # dropna=False keeps instances whose task_data has no "query" key:
+        # they all group under the None query, as before
+        for _, group in df.groupby("query", sort=False, dropna=False):
+            if len(group) == 1:
                 continue
 
-            if (
-                None in q_predictions
-            ):  # model failed to predict numeric scores for some instances
-                numeric_predictions = [
-                    pred for pred in q_predictions if pred is not None
-                ]
-                if len(numeric_predictions) <= 1:  # no meaningful ranking
+            q_predictions = group["prediction"].to_numpy(dtype=float)
+            q_references = group["reference"].to_numpy()
+            nan_mask = np.isnan(q_predictions)
+            # model failed to predict numeric scores for some instances
+            if nan_mask.any():
+                if (~nan_mask).sum() <= 1:  # no meaningful ranking
                     scores.append(0)
                     continue
                 # consider non-numeric model predictions as ranked last
-                min_value = min(numeric_predictions)
-                q_predictions = [
-                    1 + (pred - min_value) if pred is not None else 0
-                    for pred in q_predictions
-                ]
+                q_predictions = np.where(
+                    nan_mask, 0, 1 + (q_predictions - np.nanmin(q_predictions))
+                )
             scores.append(self.eval([q_references], [q_predictions]))
         return {self.main_score: mean(scores) if len(scores) > 0 else np.nan}
 
@@ -2793,6 +2830,8 @@ class RemoteMetric(StreamOperator, Metric):
     api_key: str = None
     data_classification_policy = ["public", "proprietary"]
 
+    session = None
+
     @staticmethod
     def wrap_inner_metric_pipeline_metric(
         metric_pipeline: MetricPipeline,
@@ -2843,10 +2882,24 @@ class RemoteMetric(StreamOperator, Metric):
         ]
         return MetricRequest(instance_inputs=instance_inputs)
 
-    def get_metric_response(self, metric_request: MetricRequest) -> MetricResponse:
-        import requests
+    def get_session(self):
+        """Return a pooled HTTP session, built once and reused across requests.
+
+        Reusing one session keeps the TCP/TLS connection to the endpoint alive
+        instead of re-establishing it for every metric invocation.
+        """
+        if self.session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+        return self.session
 
-        response = requests.post(
+    def get_metric_response(self, metric_request: MetricRequest) -> MetricResponse:
+        response = self.get_session().post(
             url=self.get_metric_url(),
             json=metric_request.to_dict(),
             headers={"Authorization": f"Bearer {self.api_key}"},
@@ -2884,13 +2937,11 @@ def validate_subgroup_types(
         dict with all NaN scores removed; control_subgroup_types and comparison_subgroup_types will have non-unique elements removed
     """
     # note: subgroup_scores_dict is already a defaultdict of lists, so don't need to check that keys in control_ and comparison_subgroup_types exist in it
-    # remove any NaNs
-    subgroup_scores_dict.update(
-        {
-            subgroup_name: [score for score in score_list if not np.isnan(score)]
-            for subgroup_name, score_list in subgroup_scores_dict.items()
-        }
-    )
+    # remove any NaNs, converting each score list to an ndarray once and
+    # filtering it with a boolean mask rather than a python list comprehension
+    for subgroup_name, score_list in subgroup_scores_dict.items():
+        scores = np.asarray(score_list, dtype=float)
+        subgroup_scores_dict[subgroup_name] = scores[~np.isnan(scores)]
     assert isinstance(
         control_subgroup_types, list
     ), "control_subgroup_types must be a list"
@@ -2904,6 +2955,29 @@ def validate_subgroup_types(
     return subgroup_scores_dict, control_subgroup_types, comparison_subgroup_types
 
 
+def group_subgroup_scores(
+    subgroup_scores_dict: Dict[str, List], subgroup_types_lists: List[List[str]]
+):
+    """Concatenate the scores of each list of subgroup types into a single array per list.
+
+    Shared by the group-comparison functions below so that each of them assembles
+    (and averages) every group's scores exactly once per call.
+
+    Args:
+        subgroup_scores_dict: dict where keys are subgroup types and values are arrays of instance scores.
+        subgroup_types_lists: list of lists of subgroup types (potential keys of subgroup_scores_dict).
+
+    Returns:
+        list with one concatenated score array per element of subgroup_types_lists.
+    """
+    return [
+        np.concatenate(
+            [subgroup_scores_dict[subgroup_name] for subgroup_name in name_list]
+        )
+        for name_list in subgroup_types_lists
+    ]
+
+
 def performance_drop_rate(
     subgroup_scores_dict: Dict[str, List],
     control_subgroup_types: List[str],
@@ -2933,17 +3007,16 @@ def performance_drop_rate(
     )
 
     # combine all scores from each label (if there are more than 1 in each group) into a list
-    group_scores_list = [
-        np.concatenate(
-            [subgroup_scores_dict[subgroup_name] for subgroup_name in name_list]
-        )
-        for name_list in [control_subgroup_types, comparison_subgroup_types]
-    ]
-    if any(len(scores) == 0 for scores in group_scores_list):
+    group_scores_list = group_subgroup_scores(
+        subgroup_scores_dict, [control_subgroup_types, comparison_subgroup_types]
+    )
+    if any(scores.size == 0 for scores in group_scores_list):
         # no comparison can be made since there is not at least one score per type
         return np.nan
-    control_mean = mean(group_scores_list[0])
-    comparison_mean = mean(group_scores_list[1])
+    # np.concatenate already produced contiguous float arrays, so take the means
+    # with a single C-level reduction each instead of statistics.mean
+    control_mean = group_scores_list[0].mean()
+    comparison_mean = group_scores_list[1].mean()
     if control_mean == 0:
         # return 0 if comparison is also 0
         if comparison_mean == 0:
@@ -2953,6 +3026,21 @@ def performance_drop_rate(
     return 1 - comparison_mean / control_mean
 
 
+_ONE_OVER_PI = 1.0 / math.pi
+
+# thresholds of the absolute effect size value, and the interpretation label of each bucket
+_EFFECT_SIZE_THRESHOLDS = (0.01, 0.2, 0.5, 0.8, 1.2, 2.0)
+_EFFECT_SIZE_LABELS = (
+    "essentially zero",
+    "very small",
+    "small",
+    "medium",
+    "large",
+    "very large",
+    "huge",
+)
+
+
 def interpret_effect_size(x: float):
     """Return a string rule-of-thumb interpretation of an effect size value, as defined by Cohen/Sawilowsky.
 
@@ -2975,23 +3063,12 @@ def interpret_effect_size(x: float):
     Returns:
         string interpretation
     """
-    import pandas as pd
-
-    # assign a label according to threshold of the absolute value
-    return pd.cut(
-        x=[np.abs(x)],
-        right=False,
-        bins=[-1, 0.01, 0.2, 0.5, 0.8, 1.2, 2.0, np.Inf],
-        labels=[
-            "essentially zero",
-            "very small",
-            "small",
-            "medium",
-            "large",
-            "very large",
-            "huge",
-        ],
-    )[0]
+    x = float(x)
+    if math.isnan(x):
+        return np.nan
+    # assign a label according to threshold of the absolute value; plain
+    # bisect on python scalars, no ufunc dispatch for a single value
+    return _EFFECT_SIZE_LABELS[bisect_right(_EFFECT_SIZE_THRESHOLDS, abs(x))]
 
 
 def normalized_cohens_h(
@@ -2999,6 +3076,7 @@ def normalized_cohens_h(
     control_subgroup_types: List[str],
     comparison_subgroup_types: List[str],
     interpret=False,
+    return_abs=False,
 ):
     """Cohen's h effect size between two proportions, normalized to interval [-1,1].
 
@@ -3027,6 +3105,7 @@ def normalized_cohens_h(
         comparison_subgroup_types: list of subgroup types (potential keys of subgroup_scores_dict) that are the group
             to be compared to the control group.
         interpret: boolean, whether to interpret the significance of the score or not
+        return_abs: boolean, whether to return the absolute value of the score, to measure change in either direction
     Returns:
         float score between -1 and 1, and a string interpretation if interpret=True
     """
@@ -3038,40 +3117,55 @@ def normalized_cohens_h(
         subgroup_scores_dict, control_subgroup_types, comparison_subgroup_types
     )
 
-    # requires scores to be in [0,1]
+    # requires scores to be in [0,1]; check with two C-level reductions per
+    # score array instead of a python comparison per element
     for subgroup_name, score_list in subgroup_scores_dict.items():
-        assert all(
-            0 <= score <= 1 for score in score_list
+        assert score_list.size == 0 or (
+            score_list.min() >= 0 and score_list.max() <= 1
         ), f"all {subgroup_name} scores must be in [0,1]"
 
     # combine all scores from each label (if there are more than 1 in each group) into a list
-    group_scores_list = [
-        np.concatenate(
-            [subgroup_scores_dict[subgroup_name] for subgroup_name in name_list]
-        )
-        for name_list in [control_subgroup_types, comparison_subgroup_types]
-    ]
+    group_scores_list = group_subgroup_scores(
+        subgroup_scores_dict, [control_subgroup_types, comparison_subgroup_types]
+    )
 
     if any(len(scores) == 0 for scores in group_scores_list):
         # no comparison can be made since there is not at least one score per type
         h, norm_h = np.nan, np.nan
     else:
-        control_mean = mean(group_scores_list[0])
-        comparison_mean = mean(group_scores_list[1])
-        h = 2 * (np.arcsin(np.sqrt(comparison_mean)) - np.arcsin(np.sqrt(control_mean)))
-        norm_h = np.clip(a=h / np.pi, a_min=-1, a_max=1)
+        control_mean = group_scores_list[0].mean()
+        comparison_mean = group_scores_list[1].mean()
+        # libm asin/sqrt on scalars; the ufunc machinery costs far more than
+        # the transform itself for two values
+        h = 2.0 * (
+            math.asin(math.sqrt(comparison_mean)) - math.asin(math.sqrt(control_mean))
+        )
+        # scalar clamp; no ndarray allocation for a single value
+        norm_h = max(-1.0, min(1.0, h * _ONE_OVER_PI))
 
+    if return_abs:
+        norm_h = abs(norm_h)
     if not interpret:
         return norm_h
 
     return norm_h, interpret_effect_size(h)
 
 
+# Hedges' g small-sample correction factor per total sample size n, looked up
+# at min(n, 50); identity outside the adjustment range 3 < n < 50
+_HEDGES_CORRECTION = np.array(
+    [1.0] * 4
+    + [((n - 3) / (n - 2.25)) * math.sqrt((n - 2) / n) for n in range(4, 50)]
+    + [1.0]
+)
+
+
 def normalized_hedges_g(
     subgroup_scores_dict: Dict[str, List[float]],
     control_subgroup_types: List[str],
     comparison_subgroup_types: List[str],
     interpret=False,
+    return_abs=False,
 ):
     """Hedge's g effect size between mean of two samples, normalized to interval [-1,1].  Better than Cohen's d for small sample sizes.
 
@@ -3083,6 +3177,7 @@ def normalized_hedges_g(
         comparison_subgroup_types: list of subgroup types (potential keys of subgroup_scores_dict) that are the group
             to be compared to the control group.
         interpret: boolean, whether to interpret the significance of the score or not
+        return_abs: boolean, whether to return the absolute value of the score, to measure change in either direction
     Returns:
         float score between -1 and 1, and a string interpretation if interpret=True
     """
@@ -3095,12 +3190,9 @@ def normalized_hedges_g(
     )
 
     # combine all scores from each label (if there are more than 1 in each group) into a list
-    group_scores_list = [
-        np.concatenate(
-            [subgroup_scores_dict[subgroup_name] for subgroup_name in name_list]
-        )
-        for name_list in [control_subgroup_types, comparison_subgroup_types]
-    ]
+    group_scores_list = group_subgroup_scores(
+        subgroup_scores_dict, [control_subgroup_types, comparison_subgroup_types]
+    )
 
     group_n = [len(scores) for scores in group_scores_list]
     if any(nn == 0 for nn in group_n) or all(nn <= 1 for nn in group_n):
@@ -3110,14 +3202,15 @@ def normalized_hedges_g(
         g, norm_g = np.nan, np.nan
     else:
         # otherwise, calculate the variances
-        group_mean = [mean(scores) for scores in group_scores_list]
+        # there are always exactly two groups, so unroll the list comprehensions
+        control_scores, comparison_scores = group_scores_list
+        n1, n2 = group_n
+        group_mean = [control_scores.mean(), comparison_scores.mean()]
         # sample variance with 1 degree of freedom (denominator n-1); if n=1, return 0 since otherwise throws an error
-        group_var = [
-            0.0 if nn == 1 else np.var(scores, ddof=1)
-            for scores, nn in zip(group_scores_list, group_n)
-        ]
-        var_total = sum([(nn - 1) * vv for vv, nn in zip(group_var, group_n)])
-        pooled_sd = np.sqrt(var_total / (sum(group_n) - 2))
+        control_var = 0.0 if n1 == 1 else control_scores.var(ddof=1)
+        comparison_var = 0.0 if n2 == 1 else comparison_scores.var(ddof=1)
+        var_total = (n1 - 1) * control_var + (n2 - 1) * comparison_var
+        pooled_sd = np.sqrt(var_total / (n1 + n2 - 2))
 
         max_absolute_value = 5
         gmd = float(group_mean[1] - group_mean[0])
@@ -3132,15 +3225,17 @@ def normalized_hedges_g(
                 # return a large effect size to avoid explosion if there is zero variance
                 g = np.sign(gmd) * max_absolute_value
 
-        n = sum(group_n)
-        if 3 < n < 50:
-            # small sample adjustment see https://www.itl.nist.gov/div898/software/dataplot/refman2/auxillar/hedgeg.htm
-            # the multiplier is 0 if n <= 3
-            g *= ((n - 3) / (n - 2.25)) * np.sqrt((n - 2) / n)
+        n = n1 + n2
+        # small sample adjustment see https://www.itl.nist.gov/div898/software/dataplot/refman2/auxillar/hedgeg.htm
+        # the correction factors are precomputed per sample size in
+        # _HEDGES_CORRECTION, with 1 (no adjustment) outside 3 < n < 50
+        g *= _HEDGES_CORRECTION[min(n, 50)]
         # clip it at a very large value so it doesn't become infinite if the variance (denominator) is very small or 0
-        g = float(np.clip(a=g, a_min=-1 * max_absolute_value, a_max=max_absolute_value))
+        g = float(max(-max_absolute_value, min(g, max_absolute_value)))
         norm_g = g / max_absolute_value
 
+    if return_abs:
+        norm_g = abs(norm_g)
     if not interpret:
         return norm_g
     return norm_g, interpret_effect_size(g)
@@ -3163,13 +3258,50 @@ def mean_subgroup_score(
     )
 
     # combine all desired subgroup scores
-    score_list = np.concatenate(
-        [subgroup_scores_dict[subgroup_name] for subgroup_name in subgroup_types]
-    )
+    [score_list] = group_subgroup_scores(subgroup_scores_dict, [subgroup_types])
     if len(score_list) == 0:
         # no scores to use
         return np.nan
-    return mean(score_list)
+    return score_list.mean()
+
+
+def subgroup_mean_reduction(score_name: str, subgroup_types: List[str]):
+    """Build a fixed-group 'group_mean' reduction_map averaging the given subgroup types.
+
+    Shared by the metric-class pairs below so that each aggregation pattern is
+    declared once instead of being repeated per class.
+    """
+    return {
+        "group_mean": {
+            "agg_func": [
+                score_name,
+                lambda scd: mean_subgroup_score(
+                    subgroup_scores_dict=scd, subgroup_types=subgroup_types
+                ),
+                True,
+            ],
+        }
+    }
+
+
+def paraphrase_comparison_reduction(
+    score_name: str, comparison_func, **comparison_kwargs
+):
+    """Build a fixed-group 'group_mean' reduction_map comparing 'original' to 'paraphrase' variants."""
+    return {
+        "group_mean": {
+            "agg_func": [
+                score_name,
+                lambda scd: comparison_func(
+                    subgroup_scores_dict=scd,
+                    control_subgroup_types=["original"],
+                    comparison_subgroup_types=["paraphrase"],
+                    **comparison_kwargs,
+                ),
+                True,
+            ],
+        }
+    }
 
 
 # metrics using mean reduction
@@ -3196,101 +3328,41 @@ class FixedGroupMeanStringContainment(StringContainment):
 class FixedGroupMeanBaselineAccuracy(Accuracy):
     subgroup_column = "variant_type"
     # take mean of "original" variants only
-    reduction_map = {
-        "group_mean": {
-            "agg_func": [
-                "mean_baseline",
-                lambda scd: mean_subgroup_score(
-                    subgroup_scores_dict=scd, subgroup_types=["original"]
-                ),
-                True,
-            ],
-        }
-    }
+    reduction_map = subgroup_mean_reduction("mean_baseline", ["original"])
 
 
 class FixedGroupMeanParaphraseAccuracy(Accuracy):
     subgroup_column = "variant_type"
     # take mean of "paraphrase" variants only
-    reduction_map = {
-        "group_mean": {
-            "agg_func": [
-                "mean_paraphrase",
-                lambda scd: mean_subgroup_score(
-                    subgroup_scores_dict=scd, subgroup_types=["paraphrase"]
-                ),
-                True,
-            ],
-        }
-    }
+    reduction_map = subgroup_mean_reduction("mean_paraphrase", ["paraphrase"])
 
 
 # same as above but using StringContainment
 class FixedGroupMeanBaselineStringContainment(StringContainment):
     subgroup_column = "variant_type"
     # take mean of "original" variants only
-    reduction_map = {
-        "group_mean": {
-            "agg_func": [
-                "mean_baseline",
-                lambda scd: mean_subgroup_score(
-                    subgroup_scores_dict=scd, subgroup_types=["original"]
-                ),
-                True,
-            ],
-        }
-    }
+    reduction_map = subgroup_mean_reduction("mean_baseline", ["original"])
 
 
 class FixedGroupMeanParaphraseStringContainment(StringContainment):
     subgroup_column = "variant_type"
     # take mean of "paraphrase" variants only
-    reduction_map = {
-        "group_mean": {
-            "agg_func": [
-                "mean_paraphrase",
-                lambda scd: mean_subgroup_score(
-                    subgroup_scores_dict=scd, subgroup_types=["paraphrase"]
-                ),
-                True,
-            ],
-        }
-    }
+    reduction_map = subgroup_mean_reduction("mean_paraphrase", ["paraphrase"])
 
 
 # using PDR
 class FixedGroupPDRParaphraseAccuracy(Accuracy):
     subgroup_column = "variant_type"
-    reduction_map = {
-        "group_mean": {
-            "agg_func": [
-                "pdr_paraphrase",
-                lambda scd: performance_drop_rate(
-                    subgroup_scores_dict=scd,
-                    control_subgroup_types=["original"],
-                    comparison_subgroup_types=["paraphrase"],
-                ),
-                True,
-            ],
-        }
-    }
+    reduction_map = paraphrase_comparison_reduction(
+        "pdr_paraphrase", performance_drop_rate
+    )
 
 
 class FixedGroupPDRParaphraseStringContainment(StringContainment):
     subgroup_column = "variant_type"
-    reduction_map = {
-        "group_mean": {
-            "agg_func": [
-                "pdr_paraphrase",
-                lambda scd: performance_drop_rate(
-                    subgroup_scores_dict=scd,
-                    control_subgroup_types=["original"],
-                    comparison_subgroup_types=["paraphrase"],
-                ),
-                True,
-            ],
-        }
-    }
+    reduction_map = paraphrase_comparison_reduction(
+        "pdr_paraphrase", performance_drop_rate
+    )
 
 
 class GroupMeanTokenOverlap(TokenOverlap):
@@ -3305,148 +3377,60 @@ class GroupMeanTokenOverlap(TokenOverlap):
 # using Cohens's h for proportions
 class FixedGroupNormCohensHParaphraseAccuracy(Accuracy):
     subgroup_column = "variant_type"
-    reduction_map = {
-        "group_mean": {
-            "agg_func": [
-                "norm_cohens_h_paraphrase",
-                lambda scd: normalized_cohens_h(
-                    subgroup_scores_dict=scd,
-                    control_subgroup_types=["original"],
-                    comparison_subgroup_types=["paraphrase"],
-                ),
-                True,
-            ],
-        }
-    }
+    reduction_map = paraphrase_comparison_reduction(
+        "norm_cohens_h_paraphrase", normalized_cohens_h
+    )
 
 
 class FixedGroupNormCohensHParaphraseStringContainment(StringContainment):
     subgroup_column = "variant_type"
-    reduction_map = {
-        "group_mean": {
-            "agg_func": [
-                "norm_cohens_h_paraphrase",
-                lambda scd: normalized_cohens_h(
-                    subgroup_scores_dict=scd,
-                    control_subgroup_types=["original"],
-                    comparison_subgroup_types=["paraphrase"],
-                ),
-                True,
-            ],
-        }
-    }
+    reduction_map = paraphrase_comparison_reduction(
+        "norm_cohens_h_paraphrase", normalized_cohens_h
+    )
 
 
 # using Hedges' g (takes into account internal variation in group scores)
 class FixedGroupNormHedgesGParaphraseAccuracy(Accuracy):
     subgroup_column = "variant_type"
-    reduction_map = {
-        "group_mean": {
-            "agg_func": [
-                "norm_hedges_g_paraphrase",
-                lambda scd: normalized_hedges_g(
-                    subgroup_scores_dict=scd,
-                    control_subgroup_types=["original"],
-                    comparison_subgroup_types=["paraphrase"],
-                ),
-                True,
-            ],
-        }
-    }
+    reduction_map = paraphrase_comparison_reduction(
+        "norm_hedges_g_paraphrase", normalized_hedges_g
+    )
 
 
 class FixedGroupNormHedgesGParaphraseStringContainment(StringContainment):
     subgroup_column = "variant_type"
-    reduction_map = {
-        "group_mean": {
-            "agg_func": [
-                "norm_hedges_g_paraphrase",
-                lambda scd: normalized_hedges_g(
-                    subgroup_scores_dict=scd,
-                    control_subgroup_types=["original"],
-                    comparison_subgroup_types=["paraphrase"],
-                ),
-                True,
-            ],
-        }
-    }
+    reduction_map = paraphrase_comparison_reduction(
+        "norm_hedges_g_paraphrase", normalized_hedges_g
+    )
 
 
 # for above metrics, take absolute value of group score first; this measures variation in either direction
 class FixedGroupAbsvalNormCohensHParaphraseAccuracy(Accuracy):
     subgroup_column = "variant_type"
-    reduction_map = {
-        "group_mean": {
-            "agg_func": [
-                "absval_norm_cohens_h_paraphrase",
-                lambda scd: np.abs(
-                    normalized_cohens_h(
-                        subgroup_scores_dict=scd,
-                        control_subgroup_types=["original"],
-                        comparison_subgroup_types=["paraphrase"],
-                    )
-                ),
-                True,
-            ],
-        }
-    }
+    reduction_map = paraphrase_comparison_reduction(
+        "absval_norm_cohens_h_paraphrase", normalized_cohens_h, return_abs=True
+    )
 
 
 class FixedGroupAbsvalNormCohensHParaphraseStringContainment(StringContainment):
     subgroup_column = "variant_type"
-    reduction_map = {
-        "group_mean": {
-            "agg_func": [
-                "absval_norm_cohens_h_paraphrase",
-                lambda scd: np.abs(
-                    normalized_cohens_h(
-                        subgroup_scores_dict=scd,
-                        control_subgroup_types=["original"],
-                        comparison_subgroup_types=["paraphrase"],
-                    )
-                ),
-                True,
-            ],
-        }
-    }
+    reduction_map = paraphrase_comparison_reduction(
+        "absval_norm_cohens_h_paraphrase", normalized_cohens_h, return_abs=True
+    )
 
 
 class FixedGroupAbsvalNormHedgesGParaphraseAccuracy(Accuracy):
     subgroup_column = "variant_type"
-    reduction_map = {
-        "group_mean": {
-            "agg_func": [
-                "absval_norm_hedges_g_paraphrase",
-                lambda scd: np.abs(
-                    normalized_hedges_g(
-                        subgroup_scores_dict=scd,
-                        control_subgroup_types=["original"],
-                        comparison_subgroup_types=["paraphrase"],
-                    )
-                ),
-                True,
-            ],
-        }
-    }
+    reduction_map = paraphrase_comparison_reduction(
+        "absval_norm_hedges_g_paraphrase", normalized_hedges_g, return_abs=True
+    )
 
 
 class FixedGroupAbsvalNormHedgesGParaphraseStringContainment(StringContainment):
     subgroup_column = "variant_type"
-    reduction_map = {
-        "group_mean": {
-            "agg_func": [
-                "absval_norm_hedges_g_paraphrase",
-                lambda scd: np.abs(
-                    normalized_hedges_g(
-                        subgroup_scores_dict=scd,
-                        control_subgroup_types=["original"],
-                        comparison_subgroup_types=["paraphrase"],
-                    )
-                ),
-                True,
-            ],
-        }
-    }
+    reduction_map = paraphrase_comparison_reduction(
+        "absval_norm_hedges_g_paraphrase", normalized_hedges_g, return_abs=True
+    )
 
 
 class BinaryMaxF1(F1Binary):
@@ -3462,37 +3446,66 @@ class BinaryMaxF1(F1Binary):
         predictions: List[List[float]],
         task_data: List[Dict],
     ) -> dict:
-        best_thr = -1
-        best_f1 = defaultdict(lambda: -1)
-        best_thr_neg = -1
-        best_f1_neg = defaultdict(lambda: -1)
-        thrs = {round(fp, 3) for fp in predictions}
-        for thr in thrs:
-            new_predictions = [
-                1.0 if float_prediction >= thr else 0.0
-                for float_prediction in predictions
-            ]
-            f1_results = super().compute(references, new_predictions, task_data)
+        float_predictions = np.asarray(predictions, dtype=np.float64)
+        int_references = np.asarray([int(r[0]) for r in references])
+
+        # every distinct rounded prediction is a candidate threshold; instead
+        # of recomputing F1 from scratch per threshold, count how many
+        # predictions of each class fall below every threshold at once with
+        # searchsorted over the sorted predictions
+        thresholds = np.unique(np.round(float_predictions, 3))
+        sorted_all = np.sort(float_predictions)
+        sorted_pos = np.sort(float_predictions[int_references == 1])
+        sorted_neg = np.sort(float_predictions[int_references == 0])
+
+        # per threshold, the number of predictions classified negative (< thr)
+        below_all = np.searchsorted(sorted_all, thresholds, side="left")
+        below_pos = np.searchsorted(sorted_pos, thresholds, side="left")
+        below_neg = np.searchsorted(sorted_neg, thresholds, side="left")
+
+        def precision_recall_f1(true_count, predicted_count, class_size):
+            # mirrors sklearn's zero_division=0 behavior
+            precision = np.divide(
+                true_count,
+                predicted_count,
+                out=np.zeros(true_count.shape),
+                where=predicted_count > 0,
+            )
+            recall = (
+                true_count / class_size
+                if class_size > 0
+                else np.zeros(true_count.shape)
+            )
+            f1 = np.divide(
+                2 * precision * recall,
+                precision + recall,
+                out=np.zeros(true_count.shape),
+                where=(precision + recall) > 0,
+            )
+            return precision, recall, f1
 
-            f1 = f1_results["f1_binary"]
-            if f1 > best_f1["f1_binary"]:
-                best_f1 = f1_results.copy()
-                best_thr = thr
+        precision, recall, f1 = precision_recall_f1(
+            sorted_pos.size - below_pos,
+            float_predictions.size - below_all,
+            sorted_pos.size,
+        )
+        precision_neg, recall_neg, f1_neg = precision_recall_f1(
+            below_neg, below_all, sorted_neg.size
+        )
 
-            f1_neg = f1_results["f1_binary_neg"]
-            if f1_neg > best_f1_neg["f1_binary_neg"]:
-                best_f1_neg = f1_results.copy()
-                best_thr_neg = thr
+        # np.argmax returns the first maximum, i.e. the smallest best threshold
+        best = int(np.argmax(f1))
+        best_neg = int(np.argmax(f1_neg))
 
         return {
-            self.main_score: best_f1["f1_binary"],
-            "best_thr_maxf1": best_thr,
-            f"{self.main_score}_neg": best_f1_neg["f1_binary_neg"],
-            "best_thr_maxf1_neg": best_thr_neg,
-            "recall_at_max_f1": best_f1["recall_binary"],
-            "recall_at_max_f1_neg": best_f1_neg["recall_binary_neg"],
-            "precision_at_max_f1": best_f1["precision_binary"],
-            "precision_at_max_f1_neg": best_f1_neg["precision_binary_neg"],
+            self.main_score: float(f1[best]),
+            "best_thr_maxf1": float(thresholds[best]),
+            f"{self.main_score}_neg": float(f1_neg[best_neg]),
+            "best_thr_maxf1_neg": float(thresholds[best_neg]),
+            "recall_at_max_f1": float(recall[best]),
+            "recall_at_max_f1_neg": float(recall_neg[best_neg]),
+            "precision_at_max_f1": float(precision[best]),
+            "precision_at_max_f1_neg": float(precision_neg[best_neg]),
         }
 
 
@@ -3540,7 +3553,12 @@ class BinaryMaxAccuracy(GlobalMetric):
         predictions: List[str],
         task_data: List[Dict],
     ) -> dict:
-        references = [[int(r[0])] for r in references]
+        float_predictions = np.asarray(predictions, dtype=np.float64)
+        # fill the references array straight from a generator, skipping the
+        # intermediate python list; int8 is plenty for the +-1 deltas below
+        int_references = np.fromiter(
+            (int(r[0]) for r in references), dtype=np.int8, count=len(references)
+        )
 
         # Sticking to the test >= thr, accuracy induced by threshold thr is the number of float predictions
         # that pass the test (are >= thr) and are paired with reference "1" plus the number of float predictions that
@@ -3550,44 +3568,46 @@ class BinaryMaxAccuracy(GlobalMetric):
         # Hence, we only need to review thresholds being float predictions, plus a threshold being larger than
         # the largest float predictions, to induce the partition into all-failing , none-passing.
 
-        fp = [
-            (predictions[i], i, -1 if references[i][0] == 1 else +1)
-            for i in range(len(predictions))
-        ]
-        fp.sort()
-        # each triplet above: float-prediction f; f's ordinal position in float_predictions, which is also
-        # a means to obtain distinct triplets; and: the change in number of predictions that the test sends
-        # to the reference they are paired with, a change implied by a move of thr that transfers f
-        # from the set of passing the test to the set of failing it.
+        order = np.argsort(float_predictions, kind="stable")
+        sorted_predictions = float_predictions[order]
+        # the change in the number of predictions that the test sends to the
+        # reference they are paired with, implied by a move of thr that
+        # transfers the prediction from the set passing the test to the set
+        # failing it
+        delta = np.where(int_references[order] == 1, -1, 1).astype(np.int8)
 
-        rightmost_thr = 1.0 if fp[-1][0] < 1 else fp[-1][0] + 0.01
+        rightmost_thr = (
+            1.0 if sorted_predictions[-1] < 1 else sorted_predictions[-1] + 0.01
+        )
         # trying to be esthetic, have the threshold within [0,1], although this is not a requirement,
         # and even the float predictions are not guaranteed to be within the range [0,1]
 
-        current_thr = fp[0][0]
-        # partition float_predictions into all-passing, none-failing
-        current_acc = sum(r[0] == 1 for r in references)
-        # number of predictions that thr sends to the reference they are paired with
-
-        best_acc = current_acc
-        best_thr = current_thr
-
-        i = 0
-        while (i < len(predictions)) and (best_acc < len(predictions)):
-            # best_acc can not exceed len(predictions)
-            delta = fp[i][2]
-            i += 1
-            while i < len(predictions) and fp[i][0] <= fp[i - 1][0]:
-                delta += fp[i][2]
-                i += 1
-            current_acc += delta
-            if current_acc > best_acc:
-                best_acc = current_acc
-                best_thr = fp[i][0] if i < len(predictions) else rightmost_thr
+        # the partition (and hence the accuracy) only changes past the last
+        # element of every run of equal predictions
+        group_ends = np.nonzero(
+            np.append(sorted_predictions[1:] > sorted_predictions[:-1], True)
+        )[0]
+
+        # accuracy of the all-passing partition (thr = smallest prediction),
+        # followed by the accuracy after each distinct prediction moves from
+        # passing to failing, accumulated in one cumulative sum
+        all_passing_acc = np.sum(int_references == 1)
+        accuracies = np.concatenate(
+            ([all_passing_acc], all_passing_acc + np.cumsum(delta)[group_ends])
+        )
+        thresholds = np.concatenate(
+            (
+                sorted_predictions[:1],
+                sorted_predictions[group_ends[:-1] + 1],
+                [rightmost_thr],
+            )
+        )
 
+        # np.argmax returns the first maximum, i.e. the smallest best threshold
+        best = int(np.argmax(accuracies))
         return {
-            self.main_score: float(best_acc) / len(predictions),
-            "best_thr_max_acc": best_thr,
+            self.main_score: float(accuracies[best]) / len(predictions),
+            "best_thr_max_acc": float(thresholds[best]),
         }
 
 
@@ -3595,31 +3615,30 @@ class BinaryMaxAccuracy(GlobalMetric):
 # RerankRecallMetric #
 
 
-def pytrec_eval_at_k(results, qrels, at_k, metric_name):
-    import pandas as pd
-    import pytrec_eval
+@lru_cache(maxsize=32)
+def _pytrec_metric_string(metric_name, at_k):
+    return f"{metric_name}." + ",".join(str(k) for k in at_k)
 
-    metric = {}
 
-    for k in at_k:
-        metric[f"{metric_name}@{k}"] = 0.0
+def pytrec_eval_at_k(results, qrels, at_k, metric_name):
+    import pytrec_eval
 
-    metric_string = f"{metric_name}." + ",".join([str(k) for k in at_k])
-    # print('metric_string = ', metric_string)
+    # metric_name and at_k are fixed per metric instance, so the measure
+    # string is memoized rather than rebuilt on every evaluation
+    metric_string = _pytrec_metric_string(metric_name, tuple(at_k))
     evaluator = pytrec_eval.RelevanceEvaluator(
         qrels, {"ndcg", metric_string}
     )  # {map_string, ndcg_string, recall_string, precision_string})
     scores = evaluator.evaluate(results)
-    scores = pd.DataFrame(scores).transpose()
-
-    keys = []
-    column_map = {}
-    for k in at_k:
-        keys.append(f"{metric_name}_{k}")
-        column_map[f"{metric_name}_{k}"] = k
-    scores[keys].rename(columns=column_map)
-
-    return scores
+    # average each metric across queries, without a pandas roundtrip
+    return {
+        f"{metric_name}_{k}": float(
+            np.mean(
+                [query_scores[f"{metric_name}_{k}"] for query_scores in scores.values()]
+            )
+        )
+        for k in at_k
+    }
 
 
 class RerankRecall(GlobalMetric):
@@ -3648,7 +3667,7 @@ class RerankRecall(GlobalMetric):
     # This doesn't seem to make sense
     n_resamples = None
 
-    _requirements_list: List[str] = ["pandas", "pytrec_eval"]
+    _requirements_list: List[str] = ["pandas"]
 
     def compute(
         self,
@@ -3656,31 +3675,61 @@ class RerankRecall(GlobalMetric):
         predictions: List[str],
         task_data: List[Dict],
     ):
-        # Collect relevance score and ref per query/passage pair
-        results = {}
-        qrels = {}
-        for ref, pred, data in zip(references, predictions, task_data):
-            qid = data[self.query_id_field]
-            pid = data[self.passage_id_field]
-            if qid not in results:
-                results[qid] = {}
-                qrels[qid] = {}
-            # Convert string-wrapped float to regular float
-            try:
-                results[qid][pid] = float(pred)
-            except ValueError:
-                # Card testing feeds nonnumeric values in, so catch that.
-                results[qid][pid] = np.nan
-
-            # There's always a single reference per pid/qid pair
-            qrels[qid][pid] = int(ref[0])
-
-        # Compute recall @ 5
-        scores = pytrec_eval_at_k(results, qrels, self.at_k, "recall")
-        # print(scores.describe())
-        # pytrec returns numpy float32
+        import pandas as pd
+
+        # coerce the (possibly string-wrapped) predictions to floats in one
+        # C-level pass; card testing feeds nonnumeric values in, and those
+        # become NaN
+        float_predictions = np.asarray(
+            pd.to_numeric(predictions, errors="coerce"), dtype=np.float64
+        )
+
+        # group the instances by query: one stable argsort over the query ids,
+        # then slice the contiguous runs, instead of growing a dict of python
+        # lists one append at a time
+        n_instances = len(task_data)
+        qids = np.fromiter(
+            (data[self.query_id_field] for data in task_data),
+            dtype=object,
+            count=n_instances,
+        )
+        order = np.argsort(qids, kind="stable")
+        sorted_qids = qids[order]
+        run_starts = np.concatenate(
+            (
+                [0],
+                np.nonzero(sorted_qids[1:] != sorted_qids[:-1])[0] + 1,
+                [n_instances],
+            )
+        )
+
+        recall_at_k = {k: [] for k in self.at_k}
+        for start, end in zip(run_starts[:-1], run_starts[1:]):
+            indices = order[start:end]
+            preds_q = float_predictions[indices]
+            # there's always a single reference per pid/qid pair
+            relevant_q = np.asarray(
+                [int(references[i][0]) for i in indices], dtype=bool
+            )
+
+            n_relevant = int(relevant_q.sum())
+            if n_relevant == 0:
+                # no gold passage for this query; scored 0, as pytrec_eval did
+                for k in self.at_k:
+                    recall_at_k[k].append(0.0)
+                continue
+
+            # rank the passages by descending score; a non-numeric prediction
+            # is ranked first, matching how pytrec_eval ordered NaN scores
+            order_scores = np.where(np.isnan(preds_q), np.inf, preds_q)
+            ranks = (-order_scores).argsort(kind="stable").argsort()
+            gold_ranks = ranks[relevant_q]
+            for k in self.at_k:
+                recall_at_k[k].append((gold_ranks < k).sum() / n_relevant)
+
         return {
-            f"recall_at_{i}": float(scores[f"recall_{i}"].mean()) for i in self.at_k
+            f"recall_at_{k}": float(np.mean(scores))
+            for k, scores in recall_at_k.items()
         }
 
 
@@ -1,8 +1,9 @@
 import ast
 import collections.abc
+import functools
 import io
-import itertools
 import re
+import sys
 import typing
 
 from .utils import safe_eval
@@ -163,29 +164,234 @@ def parse_type_string(type_string: str) -> typing.Any:
     and basic Python data types. It also defines a list of safe tokens that are allowed
     in the type string.
     """
-    safe_context = {
-        "Any": typing.Any,
-        "List": typing.List,
-        "Dict": typing.Dict,
-        "Tuple": typing.Tuple,
-        "Union": typing.Union,
-        "int": int,
-        "str": str,
-        "float": float,
-        "bool": bool,
-        "Optional": typing.Optional,
-    }
+    return _parse_type_string_cached(type_string)
+
+
+_SAFE_CONTEXT = {
+    "Any": typing.Any,
+    "List": typing.List,
+    "Dict": typing.Dict,
+    "Tuple": typing.Tuple,
+    "Union": typing.Union,
+    "int": int,
+    "str": str,
+    "float": float,
+    "bool": bool,
+    "Optional": typing.Optional,
+}
+
+_SAFE_TOKENS = ["[", "]", ",", " "]
 
-    type_string = format_type_string(type_string)
 
-    safe_tokens = ["[", "]", ",", " "]
-    return safe_eval(type_string, safe_context, safe_tokens)
+# the same handful of type strings get parsed over and over across instances;
+# the resulting typing objects are immutable and shared, so caching them is safe
+@functools.lru_cache(maxsize=1024)
+def _parse_type_string_cached(type_string: str) -> typing.Any:
+    type_string = format_type_string(type_string)
+    return safe_eval(type_string, _SAFE_CONTEXT, _SAFE_TOKENS)
 
 
 def infer_type(obj) -> typing.Any:
     return parse_type_string(infer_type_string(obj))
 
 
+# interned tag and basic-type names let the very frequent comparisons in
+# _parse_type_ast and _is_covered_by run as identity checks
+_BASIC = sys.intern("basic")
+_LIST = sys.intern("List")
+_DICT = sys.intern("Dict")
+_TUPLE = sys.intern("Tuple")
+_UNION = sys.intern("Union")
+_BOOL = sys.intern("bool")
+_INT = sys.intern("int")
+_ANY = sys.intern("Any")
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_type_ast(type_name: str) -> tuple:
+    # Parses a type name, as generated by infer_type_string, into a small tagged tuple tree:
+    # ("basic", name), ("List", child), ("Dict", key, val), ("Tuple", (children)), or
+    # ("Union", frozenset(children)). A single scan tracking bracket depth splits the
+    # arguments on top-level commas only, so nested Dict-s and Tuple-s parse correctly.
+    # The cache pays off because merge_into compares the same small set of operands
+    # over and over while inferring the type of a large container.
+    bracket = type_name.find("[")
+    if bracket == -1:
+        return (_BASIC, sys.intern(type_name))
+    tag = sys.intern(type_name[:bracket])
+    inner = type_name[bracket + 1 : -1]
+    args = []
+    depth = 0
+    start = 0
+    for i, ch in enumerate(inner):
+        if ch == "[":
+            depth += 1
+        elif ch == "]":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            args.append(_parse_type_ast(inner[start:i]))
+            start = i + 1
+    args.append(_parse_type_ast(inner[start:]))
+    if tag is _LIST:
+        return (_LIST, args[0])
+    if tag is _DICT:
+        return (_DICT, args[0], args[1])
+    if tag is _TUPLE:
+        return (_TUPLE, tuple(args))
+    assert tag is _UNION, "parsing error"
+    return (_UNION, frozenset(args))
+
+
+def _ast_to_str(type_ast: tuple) -> str:
+    tag = type_ast[0]
+    if tag is _BASIC:
+        return type_ast[1]
+    if tag is _LIST:
+        return "List[" + _ast_to_str(type_ast[1]) + "]"
+    if tag is _DICT:
+        return "Dict[" + _ast_to_str(type_ast[1]) + "," + _ast_to_str(type_ast[2]) + "]"
+    if tag is _TUPLE:
+        return "Tuple[" + ",".join(_ast_to_str(arg) for arg in type_ast[1]) + "]"
+    # Union members are emitted sorted by their string form, keeping the encoding
+    # deterministic regardless of the order in which the members were merged.
+    return "Union[" + ",".join(sorted(_ast_to_str(arg) for arg in type_ast[1])) + "]"
+
+
+def _is_covered_by(left: tuple, right: tuple) -> bool:
+    # Checks whether every object of type left is also an object of type right,
+    # both given as trees from _parse_type_ast.
+    if left == right:
+        return True
+    if left[0] is _UNION:
+        if right[0] is _UNION:
+            # members present verbatim on the right are covered by a single
+            # C-level frozenset difference; only the remainder needs recursion
+            remainder = left[1] - right[1]
+            if not remainder:
+                return True
+            return all(_is_covered_by(left_el, right) for left_el in remainder)
+        return all(_is_covered_by(left_el, right) for left_el in left[1])
+    if right[0] is _UNION:
+        if left in right[1]:
+            return True
+        return any(_is_covered_by(left, right_el) for right_el in right[1])
+    if left[0] is _LIST and right[0] is _LIST:
+        return _is_covered_by(left[1], right[1])
+    if left[0] is _DICT and right[0] is _DICT:
+        return _is_covered_by(left[1], right[1]) and _is_covered_by(left[2], right[2])
+    if left[0] is _TUPLE and right[0] is _TUPLE:
+        if len(left[1]) != len(right[1]):
+            return False
+        return all(
+            _is_covered_by(left_el, right_el)
+            for (left_el, right_el) in zip(left[1], right[1])
+        )
+    if left[0] is _BASIC:
+        if left[1] is _BOOL and right[0] is _BASIC and right[1] is _INT:
+            return True
+        if left[1] is _ANY:
+            return True
+
+    return False
+
+
+def _merge_into(left: tuple, right: typing.List[tuple]):
+    # merge the set of types from left into the set of types from right, yielding a set that
+    # covers both. None of the input sets contain Union as main element. Union may reside inside
+    # List, or Dict, or Tuple.
+    # This is needed when building a parent List, e.g. from its elements, and the
+    # type of that list needs to be the union of the types of its elements.
+    # if all elements have same type -- this is the type to write in List[type]
+    # if not -- we write List[Union[type1, type2,...]].
+
+    for i, right_el in enumerate(right):
+        if _is_covered_by(right_el, left):
+            right[i] = left
+            return
+    for right_el in right:
+        if _is_covered_by(left, right_el):
+            return
+    right.append(left)
+
+
+def _encode_a_list_of_type_names(list_of_type_names: typing.List[str]) -> str:
+    # The type_names in the input are the set of names of all the elements of one list object,
+    # or all the keys of one dict object, or all the val thereof, or all the type names of a specific position
+    # in a tuple object The result should be a name of a type that covers them all.
+    # So if, for example, the input contains both 'bool' and 'int', then 'int' suffices to cover both.
+    # 'Any' can not show as a type_name of a basic (sub)object, but 'List[Any]' can show for an element of
+    # a list object, an element that is an empty list. In such a case, if there are other elements in the input
+    # that are more specific, e.g. 'List[str]' we should take the latter, and discard 'List[Any]' in order to get
+    # a meaningful result: as narrow as possible but covers all.
+    #
+    to_ret = []
+    for type_name in list_of_type_names:
+        _merge_into(_parse_type_ast(type_name), to_ret)
+
+    if len(to_ret) == 1:
+        return _ast_to_str(to_ret[0])
+    return "Union[" + ",".join(sorted(_ast_to_str(typ) for typ in to_ret)) + "]"
+
+
+def _infer_list(obj: list) -> str:
+    # containers typically hold very few distinct member types, so a membership
+    # check against a short list beats hashing every inferred name into a set
+    included_types = []
+    for list_el in obj:
+        type_name = infer_type_string(list_el)
+        if type_name not in included_types:
+            included_types.append(type_name)
+    if len(included_types) == 0:
+        return "List[Any]"
+    return "List[" + _encode_a_list_of_type_names(included_types) + "]"
+
+
+def _infer_dict(obj: dict) -> str:
+    if len(obj) == 0:
+        return "Dict[Any,Any]"
+    included_key_types = []
+    included_val_types = []
+    for k, v in obj.items():
+        key_type_name = infer_type_string(k)
+        if key_type_name not in included_key_types:
+            included_key_types.append(key_type_name)
+        val_type_name = infer_type_string(v)
+        if val_type_name not in included_val_types:
+            included_val_types.append(val_type_name)
+    return (
+        "Dict["
+        + _encode_a_list_of_type_names(included_key_types)
+        + ","
+        + _encode_a_list_of_type_names(included_val_types)
+        + "]"
+    )
+
+
+def _infer_tuple(obj: tuple) -> str:
+    if len(obj) == 0:
+        return "Tuple[Any]"
+    return "Tuple[" + ",".join(infer_type_string(sub_tup) for sub_tup in obj) + "]"
+
+
+# bool shows before int, because bool is subtype of int and the slow-path
+# isinstance ladder below iterates this dict in insertion order
+_BASIC_TYPE_NAMES = {
+    bool: "bool",
+    int: "int",
+    str: "str",
+    float: "float",
+}
+
+# O(1) dispatch on the exact type of the object, covering the common case of every
+# recursive infer_type_string call. Instances of subclasses miss this table and fall
+# through to the isinstance ladder below.
+_TYPE_HANDLERS = {
+    list: _infer_list,
+    dict: _infer_dict,
+    tuple: _infer_tuple,
+}
+
+
 def infer_type_string(obj: typing.Any) -> str:
     """Encodes the type of a given object into a string.
 
@@ -210,203 +416,110 @@ def infer_type_string(obj: typing.Any) -> str:
         infer_type_string([[], 7, True]) returns "List[Union[List[Any],int]]"   because bool is also an int
 
     """
-
-    def consume_arg(args_list: str) -> typing.Tuple[str, str]:
-        first_word = re.search(r"^(List\[|Dict\[|Union\[|Tuple\[)", args_list)
-        if not first_word:
-            first_word = re.search(r"^(str|bool|int|float|Any)", args_list)
-            assert first_word, "parsing error"
-            return first_word.group(), args_list[first_word.span()[1] :]
-        arg_to_ret = first_word.group()
-        args_list = args_list[first_word.span()[1] :]
-        arg, args_list = consume_arg(args_list)
-        arg_to_ret += arg
-        while args_list.startswith(","):
-            arg, args_list = consume_arg(args_list[1:])
-            arg_to_ret = arg_to_ret + "," + arg
-        assert args_list.startswith("]"), "parsing error"
-        return arg_to_ret + "]", args_list[1:]
-
-    def find_args_in(args: str) -> typing.List[str]:
-        to_ret = []
-        while len(args) > 0:
-            arg, args = consume_arg(args)
-            to_ret.append(arg)
-            if args.startswith(","):
-                args = args[1:]
-        return to_ret
-
-    def is_covered_by(left: str, right: str) -> bool:
-        if left == right:
-            return True
-        if left.startswith("Union["):
-            return all(
-                is_covered_by(left_el, right) for left_el in find_args_in(left[6:-1])
-            )
-        if right.startswith("Union["):
-            return any(
-                is_covered_by(left, right_el) for right_el in find_args_in(right[6:-1])
-            )
-        if left.startswith("List[") and right.startswith("List["):
-            return is_covered_by(
-                left[5:-1], right[5:-1]
-            )  # un-wrap the leading List[  and the trailing ]
-        if left.startswith("Dict[") and right.startswith("Dict["):
-            return is_covered_by(
-                left[5 : left.find(",")], right[5 : right.find(",")]
-            ) and is_covered_by(
-                left[1 + left.find(",") : -1], right[1 + right.find(",") : -1]
-            )
-        if left.startswith("Tuple[") and right.startswith("Tuple["):
-            if left.count(",") != right.count(","):
-                return False
-            return all(
-                is_covered_by(left_el, right_el)
-                for (left_el, right_el) in zip(
-                    left[6:-1].split(","), right[6:-1].split(",")
-                )
-            )
-        if left == "bool" and right == "int":
-            return True
-        if left == "Any":
-            return True
-
-        return False
-
-    def merge_into(left: str, right: typing.List[str]):
-        # merge the set of types from left into the set of types from right, yielding a set that
-        # covers both. None of the input sets contain Union as main element. Union may reside inside
-        # List, or Dict, or Tuple.
-        # This is needed when building a parent List, e.g. from its elements, and the
-        # type of that list needs to be the union of the types of its elements.
-        # if all elements have same type -- this is the type to write in List[type]
-        # if not -- we write List[Union[type1, type2,...]].
-
-        for right_el in right:
-            if is_covered_by(right_el, left):
-                right.remove(right_el)
-                right.append(left)
-                return
-        if not any(is_covered_by(left, right_el) for right_el in right):
-            right.append(left)
-
-    def encode_a_list_of_type_names(list_of_type_names: typing.List[str]) -> str:
-        # The type_names in the input are the set of names of all the elements of one list object,
-        # or all the keys of one dict object, or all the val thereof, or all the type names of a specific position
-        # in a tuple object The result should be a name of a type that covers them all.
-        # So if, for example, the input contains both 'bool' and 'int', then 'int' suffices to cover both.
-        # 'Any' can not show as a type_name of a basic (sub)object, but 'List[Any]' can show for an element of
-        # a list object, an element that is an empty list. In such a case, if there are other elements in the input
-        # that are more specific, e.g. 'List[str]' we should take the latter, and discard 'List[Any]' in order to get
-        # a meaningful result: as narrow as possible but covers all.
-        #
-        to_ret = []
-        for type_name in list_of_type_names:
-            merge_into(type_name, to_ret)
-
-        if len(to_ret) == 1:
-            return to_ret[0]
-        to_ret.sort()
-        ans = "Union["
-        for typ in to_ret[:-1]:
-            ans += typ + ","
-        return ans + to_ret[-1] + "]"
-
-    basic_types = [bool, int, str, float]
-    names_of_basic_types = ["bool", "int", "str", "float"]
-    # bool should show before int, because bool is subtype of int
-
-    for basic_type, name_of_basic_type in zip(basic_types, names_of_basic_types):
+    name = _BASIC_TYPE_NAMES.get(type(obj))
+    if name is not None:
+        return name
+    handler = _TYPE_HANDLERS.get(type(obj))
+    if handler is not None:
+        return handler(obj)
+
+    # slow path, for instances of subclasses of the basic or container types
+    for basic_type, name_of_basic_type in _BASIC_TYPE_NAMES.items():
         if isinstance(obj, basic_type):
             return name_of_basic_type
     if isinstance(obj, list):
-        included_types = set()
-        for list_el in obj:
-            included_types.add(infer_type_string(list_el))
-        included_types = list(included_types)
-        if len(included_types) == 0:
-            return "List[Any]"
-        return "List[" + encode_a_list_of_type_names(included_types) + "]"
+        return _infer_list(obj)
     if isinstance(obj, dict):
-        if len(obj) == 0:
-            return "Dict[Any,Any]"
-        included_key_types = set()
-        included_val_types = set()
-        for k, v in obj.items():
-            included_key_types.add(infer_type_string(k))
-            included_val_types.add(infer_type_string(v))
-        included_key_types = list(included_key_types)
-        included_val_types = list(included_val_types)
-        return (
-            "Dict["
-            + encode_a_list_of_type_names(included_key_types)
-            + ","
-            + encode_a_list_of_type_names(included_val_types)
-            + "]"
-        )
+        return _infer_dict(obj)
     if isinstance(obj, tuple):
-        if len(obj) == 0:
-            return "Tuple[Any]"
-        to_ret = "Tuple["
-        for sub_tup in obj[:-1]:
-            to_ret += infer_type_string(sub_tup) + ","
-        return to_ret + infer_type_string(obj[-1]) + "]"
+        return _infer_tuple(obj)
 
     return "Any"
 
 
-def isoftype(object, type):
-    """Checks if an object is of a certain typing type, including nested types.
+@functools.lru_cache(maxsize=1024)
+def _get_type_args(type_) -> typing.Tuple:
+    # typing aliases are hashable and their argument tuples never change,
+    # so the decomposition is computed once per distinct type
+    return typing.get_args(type_)
 
-    This function supports simple types (like `int`, `str`), typing types
-    (like `List[int]`, `Tuple[str, int]`, `Dict[str, int]`), and nested typing
-    types (like `List[List[int]]`, `Tuple[List[str], int]`, `Dict[str, List[int]]`).
 
-    Args:
-        object: The object to check.
-        type: The typing type to check against.
+def _make_isoftype():
+    # binds the names resolved on every call to closure locals, so the hot
+    # recursive path runs on LOAD_FAST/LOAD_DEREF instead of repeated
+    # LOAD_GLOBAL + LOAD_ATTR lookups
+    _any_type = typing.Any
+    _union_type = typing.Union
+    _type_args_of = _get_type_args
+    _isinstance = isinstance
+    _getattr = getattr
 
-    Returns:
-        bool: True if the object is of the specified type, False otherwise.
+    def isoftype(object, type):
+        """Checks if an object is of a certain typing type, including nested types.
 
-    Examples:
-    .. highlight:: python
-    .. code-block:: python
+        This function supports simple types (like `int`, `str`), typing types
+        (like `List[int]`, `Tuple[str, int]`, `Dict[str, int]`), and nested typing
+        types (like `List[List[int]]`, `Tuple[List[str], int]`, `Dict[str, List[int]]`).
 
-        isoftype(1, int) # True
-        isoftype([1, 2, 3], typing.List[int]) # True
-        isoftype([1, 2, 3], typing.List[str]) # False
-        isoftype([[1, 2], [3, 4]], typing.List[typing.List[int]]) # True
-    """
-    if type == typing.Any:
-        return True
+        Args:
+            object: The object to check.
+            type: The typing type to check against.
+
+        Returns:
+            bool: True if the object is of the specified type, False otherwise.
+
+        Examples:
+        .. highlight:: python
+        .. code-block:: python
 
-    if hasattr(type, "__origin__"):
-        origin = type.__origin__
-        type_args = typing.get_args(type)
+            isoftype(1, int) # True
+            isoftype([1, 2, 3], typing.List[int]) # True
+            isoftype([1, 2, 3], typing.List[str]) # False
+            isoftype([[1, 2], [3, 4]], typing.List[typing.List[int]]) # True
+        """
+        origin = _getattr(type, "__origin__", None)
+        if origin is None:
+            # plain types, the dominant case, reduce to a single isinstance check
+            if type is _any_type:
+                return True
+            return _isinstance(object, type)
+
+        type_args = _type_args_of(type)
 
-        if origin is typing.Union:
+        if origin is _union_type:
             return any(isoftype(object, sub_type) for sub_type in type_args)
 
-        if not isinstance(object, origin):
+        if not _isinstance(object, origin):
             return False
 
+        # explicit loops rather than all(...) over a generator expression: no
+        # per-element generator frame, and an immediate return on first mismatch
         if origin is list or origin is set:
-            return all(isoftype(element, type_args[0]) for element in object)
+            element_type = type_args[0]
+            if element_type is _any_type:
+                return True
+            for element in object:
+                if not isoftype(element, element_type):
+                    return False
+            return True
 
         if origin is dict:
-            return all(
-                isoftype(key, type_args[0]) and isoftype(value, type_args[1])
-                for key, value in object.items()
-            )
+            key_type, value_type = type_args
+            for key, value in object.items():
+                if not isoftype(key, key_type) or not isoftype(value, value_type):
+                    return False
+            return True
         if origin is tuple:
-            return all(
-                isoftype(element, type_arg)
-                for element, type_arg in zip(object, type_args)
-            )
+            for element, type_arg in zip(object, type_args):
+                if not isoftype(element, type_arg):
+                    return False
+            return True
         return None
 
-    return isinstance(object, type)
+    return isoftype
+
+
+isoftype = _make_isoftype()
 
 
 # copied from: https://github.com/bojiang/typing_utils/blob/main/typing_utils/__init__.py
@@ -447,19 +560,25 @@ STATIC_SUBTYPE_MAPPING: typing.Dict[type, typing.Type] = {
 
 
 def optional_all(elements) -> typing.Optional[bool]:
-    if all(elements):
-        return True
-    if all(e is False for e in elements):
-        return False
-    return unknown
+    # single pass with early exit; also correct when elements is a generator,
+    # which the previous two-scan version silently exhausted
+    saw_unknown = False
+    for e in elements:
+        if e is False:
+            return False
+        if e is None:
+            saw_unknown = True
+    return unknown if saw_unknown else True
 
 
 def optional_any(elements) -> typing.Optional[bool]:
-    if any(elements):
-        return True
-    if any(e is None for e in elements):
-        return unknown
-    return False
+    saw_unknown = False
+    for e in elements:
+        if e is True:
+            return True
+        if e is None:
+            saw_unknown = True
+    return unknown if saw_unknown else False
 
 
 def _hashable(value):
@@ -492,6 +611,54 @@ def _normalize_aliases(type_: Type) -> Type:
     return type_
 
 
+# the interpreter version is fixed once the module is loaded, so the raw
+# implementations behind get_origin/get_args are resolved here, at import time,
+# rather than through a hasattr ladder on every call
+if hasattr(typing, "get_origin"):  # python 3.8+
+    _raw_get_origin = typing.get_origin
+    _raw_get_args = typing.get_args
+elif hasattr(typing.List, "_special"):  # python 3.7
+
+    def _raw_get_origin(type_):
+        if isinstance(type_, GenericClass) and not type_._special:
+            return type_.__origin__
+        if hasattr(type_, "_special") and type_._special:
+            return type_
+        if type_ is typing.Generic:
+            return typing.Generic
+        return None
+
+    def _raw_get_args(type_):
+        if isinstance(type_, GenericClass) and not type_._special:
+            res = type_.__args__
+            if get_origin(type_) is collections.abc.Callable and res[0] is not Ellipsis:
+                res = (list(res[:-1]), res[-1])
+            return res
+        return ()
+
+else:  # python 3.6
+
+    def _raw_get_origin(type_):
+        if isinstance(type_, GenericClass):
+            ori = type_.__origin__
+            if ori is None:
+                ori = type_
+            return ori
+        if isinstance(type_, UnionClass):
+            return type_.__origin__
+        if type_ is typing.Generic:
+            return typing.Generic
+        return None
+
+    def _raw_get_args(type_):
+        if isinstance(type_, (GenericClass, UnionClass)):
+            res = type_.__args__
+            if get_origin(type_) is collections.abc.Callable and res[0] is not Ellipsis:
+                res = (list(res[:-1]), res[-1])
+            return res
+        return ()
+
+
 def get_origin(type_):
     """Get the unsubscripted version of a type.
 
@@ -515,30 +682,7 @@ def get_origin(type_):
             get_origin(List[Tuple[T, T]][int]) == list  # True
 
     """
-    if hasattr(typing, "get_origin"):  # python 3.8+
-        _getter = typing.get_origin
-        ori = _getter(type_)
-    elif hasattr(typing.List, "_special"):  # python 3.7
-        if isinstance(type_, GenericClass) and not type_._special:
-            ori = type_.__origin__
-        elif hasattr(type_, "_special") and type_._special:
-            ori = type_
-        elif type_ is typing.Generic:
-            ori = typing.Generic
-        else:
-            ori = None
-    else:  # python 3.6
-        if isinstance(type_, GenericClass):
-            ori = type_.__origin__
-            if ori is None:
-                ori = type_
-        elif isinstance(type_, UnionClass):
-            ori = type_.__origin__
-        elif type_ is typing.Generic:
-            ori = typing.Generic
-        else:
-            ori = None
-    return _normalize_aliases(ori)
+    return _normalize_aliases(_raw_get_origin(type_))
 
 
 def get_args(type_) -> typing.Tuple:
@@ -560,25 +704,7 @@ def get_args(type_) -> typing.Tuple:
             get_args(Union[int, Tuple[T, int]][str]) == (int, Tuple[str, int])  # True
             get_args(Callable[[], T][int]) == ([], int)  # True
     """
-    if hasattr(typing, "get_args"):  # python 3.8+
-        _getter = typing.get_args
-        res = _getter(type_)
-    elif hasattr(typing.List, "_special"):  # python 3.7
-        if (
-            isinstance(type_, GenericClass) and not type_._special
-        ):  # backport for python 3.8
-            res = type_.__args__
-            if get_origin(type_) is collections.abc.Callable and res[0] is not Ellipsis:
-                res = (list(res[:-1]), res[-1])
-        else:
-            res = ()
-    else:  # python 3.6
-        if isinstance(type_, (GenericClass, UnionClass)):  # backport for python 3.8
-            res = type_.__args__
-            if get_origin(type_) is collections.abc.Callable and res[0] is not Ellipsis:
-                res = (list(res[:-1]), res[-1])
-        else:
-            res = ()
+    res = _raw_get_args(type_)
     return () if res is None else res
 
 
@@ -607,9 +733,9 @@ class NormalizedType(typing.NamedTuple):
         if isinstance(other, NormalizedType):
             if self.origin != other.origin:
                 return False
-            if isinstance(self.args, frozenset) and isinstance(other.args, frozenset):
-                return self.args <= other.args and other.args <= self.args
-            return self.origin == other.origin and self.args == other.args
+            # frozenset equality is a single C-level pass, no need for a
+            # double subset comparison; tuples compare directly as well
+            return self.args == other.args
         if not self.args:
             return self.origin == other
         return False
@@ -635,8 +761,7 @@ def _normalize_args(tps: TypeArgs):
     return normalize(tps)
 
 
-def normalize(type_: Type) -> NormalizedType:
-    """Convert types to NormalizedType instances."""
+def _normalize_uncached(type_: Type) -> NormalizedType:
     args = get_args(type_)
     origin = get_origin(type_)
     if not origin:
@@ -650,23 +775,31 @@ def normalize(type_: Type) -> NormalizedType:
     return NormalizedType(origin, args)
 
 
+_normalize_cached = functools.lru_cache(maxsize=2048)(_normalize_uncached)
+
+
+def normalize(type_: Type) -> NormalizedType:
+    """Convert types to NormalizedType instances."""
+    try:
+        # types, TypeVars and typing generics are all hashable, so repeat
+        # normalizations of the same type become a single cache lookup
+        return _normalize_cached(type_)
+    except TypeError:
+        return _normalize_uncached(type_)
+
+
+@functools.lru_cache(maxsize=4096)
 def _is_origin_subtype(left: OriginType, right: OriginType) -> bool:
+    # origins are types, None or typing specials -- all hashable, and the same
+    # (left, right) pairs recur heavily during recursive issubtype descents
     if left is right:
         return True
 
-    if (
-        left is not None
-        and left in STATIC_SUBTYPE_MAPPING
-        and right == STATIC_SUBTYPE_MAPPING[left]
-    ):
+    if STATIC_SUBTYPE_MAPPING.get(left) is right:
         return True
 
-    if hasattr(left, "mro"):
-        for parent in left.mro():
-            if parent == right:
-                return True
-
     if isinstance(left, type) and isinstance(right, type):
+        # issubclass walks the mro in C, no need for a Python-level scan
         return issubclass(left, right)
 
     return left == right
@@ -720,11 +853,10 @@ def _is_origin_subtype_args(
         if len(left) != len(right):
             return False
 
+        # lengths are equal, so plain zip cannot drop or pad elements
         return all(
-            lft is not None
-            and rgt is not None
-            and _is_origin_subtype_args(lft, rgt, forward_refs)
-            for lft, rgt in itertools.zip_longest(left, right)
+            _is_origin_subtype_args(lft, rgt, forward_refs)
+            for lft, rgt in zip(left, right)
         )
 
     assert isinstance(left, NormalizedType)
@@ -738,6 +870,11 @@ def _is_normal_subtype(
     right: NormalizedType,
     forward_refs: typing.Optional[typing.Mapping[str, type]],
 ) -> typing.Optional[bool]:
+    # identical operands, the dominant case in validation loops; cached
+    # normalize returns the same instance so the identity check usually hits
+    if left is right or left == right:
+        return True
+
     if isinstance(left.origin, ForwardRef):
         left = normalize(eval_forward_ref(left.origin, forward_refs=forward_refs))
 
@@ -751,14 +888,38 @@ def _is_normal_subtype(
     # Union
     if right.origin is typing.Union and left.origin is typing.Union:
         return _is_origin_subtype_args(left.args, right.args, forward_refs)
+    # the Union branches iterate an explicit worklist, flattening nested Unions
+    # on the fly, instead of recursing through optional_any/optional_all
+    # generators -- membership in Union[Union[...]] equals membership in the
+    # flattened Union, also for the tri-state result
     if right.origin is typing.Union:
-        return optional_any(
-            _is_normal_subtype(left, a, forward_refs) for a in right.args
-        )
+        saw_unknown = False
+        worklist = list(right.args)
+        while worklist:
+            arg = worklist.pop()
+            if arg.origin is typing.Union:
+                worklist.extend(arg.args)
+                continue
+            result = _is_normal_subtype(left, arg, forward_refs)
+            if result:
+                return True
+            if result is unknown:
+                saw_unknown = True
+        return unknown if saw_unknown else False
     if left.origin is typing.Union:
-        return optional_all(
-            _is_normal_subtype(a, right, forward_refs) for a in left.args
-        )
+        saw_unknown = False
+        worklist = list(left.args)
+        while worklist:
+            arg = worklist.pop()
+            if arg.origin is typing.Union:
+                worklist.extend(arg.args)
+                continue
+            result = _is_normal_subtype(arg, right, forward_refs)
+            if result is False:
+                return False
+            if result is unknown:
+                saw_unknown = True
+        return unknown if saw_unknown else True
 
     # TypeVar
     if isinstance(left.origin, typing.TypeVar) and isinstance(
@@ -835,11 +996,17 @@ def issubtype(
 
 
 def to_float_or_default(v, failure_default=0):
+    # exact-type checks, deliberately not isinstance, skip the try/except
+    # machinery for the numeric fast path
+    if type(v) is float:  # noqa: E721
+        return v
+    if type(v) is int:  # noqa: E721
+        return float(v)
     try:
         return float(v)
-    except Exception as e:
+    except (TypeError, ValueError):
         if failure_default is None:
-            raise e
+            raise
         return failure_default
 
 
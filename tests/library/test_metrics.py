@@ -44,6 +44,7 @@ from unitxt.metrics import (
     Perplexity,
     PrecisionBinary,
     RecallBinary,
+    RerankRecall,
     RocAuc,
     Rouge,
     TokenOverlap,
@@ -528,6 +529,75 @@ class TestMetrics(UnitxtTestCase):
         )
         self.assertAlmostEqual(1.0, outputs[0]["score"]["global"]["score"])
 
+    def test_rerank_recall(self):
+        metric = RerankRecall()
+
+        # the gold passage of query "q1" has the highest score; the gold
+        # passage of query "q2" is ranked second of three
+        predictions = ["0.9", "0.1", "0.2", "0.8", "0.5"]
+        references = [["1"], ["0"], ["0"], ["0"], ["1"]]
+        task_data = [
+            {"query_id": "q1", "passage_id": "p1"},
+            {"query_id": "q1", "passage_id": "p2"},
+            {"query_id": "q2", "passage_id": "p1"},
+            {"query_id": "q2", "passage_id": "p2"},
+            {"query_id": "q2", "passage_id": "p3"},
+        ]
+        outputs = apply_metric(
+            metric=metric,
+            predictions=predictions,
+            references=references,
+            task_data=task_data,
+        )
+        global_result = outputs[0]["score"]["global"]
+        self.assertAlmostEqual(0.5, global_result["recall_at_1"])
+        self.assertAlmostEqual(1.0, global_result["recall_at_2"])
+        self.assertAlmostEqual(1.0, global_result["recall_at_5"])
+
+        # tied scores are broken by input order within the query, so the gold
+        # passage, arriving second, is ranked below the first passage
+        predictions = ["0.5", "0.5"]
+        references = [["0"], ["1"]]
+        task_data = [
+            {"query_id": "q1", "passage_id": "p1"},
+            {"query_id": "q1", "passage_id": "p2"},
+        ]
+        outputs = apply_metric(
+            metric=metric,
+            predictions=predictions,
+            references=references,
+            task_data=task_data,
+        )
+        global_result = outputs[0]["score"]["global"]
+        self.assertAlmostEqual(0.0, global_result["recall_at_1"])
+        self.assertAlmostEqual(1.0, global_result["recall_at_2"])
+
+        # a non-numeric prediction is ranked above all numeric ones
+        predictions = ["bad_input", "0.9"]
+        references = [["1"], ["0"]]
+        outputs = apply_metric(
+            metric=metric,
+            predictions=predictions,
+            references=references,
+            task_data=task_data,
+        )
+        global_result = outputs[0]["score"]["global"]
+        self.assertAlmostEqual(1.0, global_result["recall_at_1"])
+
+        # a query without any gold passage scores 0 at every k
+        predictions = ["0.9", "0.1"]
+        references = [["0"], ["0"]]
+        outputs = apply_metric(
+            metric=metric,
+            predictions=predictions,
+            references=references,
+            task_data=task_data,
+        )
+        global_result = outputs[0]["score"]["global"]
+        self.assertAlmostEqual(0.0, global_result["recall_at_1"])
+        self.assertAlmostEqual(0.0, global_result["recall_at_2"])
+        self.assertAlmostEqual(0.0, global_result["recall_at_5"])
+
     def test_f1_macro(self):
         metric = F1Macro()
         references = [["cat"], ["dog"], ["dog"], ["dog"], ["cat"], ["cat"]]